@@ -6,9 +6,7 @@
 import torch
 import torch.nn as nn
 import torch.fft
-from numpy.fft import fftshift
 import numpy as np
-import torch
 from comcloak.constants import PI
 
 def insert_dims(tensor, num_dims, axis=-1):
@@ -36,9 +34,8 @@ def insert_dims(tensor, num_dims, axis=-1):
     assert -(rank + 1) <= axis <= rank, "`axis` is out of range `[-(D+1), D]`)"
     
     axis = axis if axis >= 0 else rank + axis + 1
-    shape = list(tensor.shape)
-    new_shape = shape[:axis] + [1] * num_dims + shape[axis:]
-    return tensor.view(*new_shape)
+    new_shape = tensor.shape[:axis] + (1,) * num_dims + tensor.shape[axis:]
+    return tensor.reshape(new_shape)
 
 def expand_to_rank(tensor, target_rank, axis=-1):
     """Inserts as many axes to a tensor as needed to achieve a desired rank.
@@ -64,12 +61,16 @@ def expand_to_rank(tensor, target_rank, axis=-1):
         If `target_rank` <= rank(`tensor`), `tensor` is returned.
     """
     num_dims = max(target_rank - tensor.dim(), 0)
-    if num_dims > 0:
-        tensor = insert_dims(tensor, num_dims, axis)
-    return tensor
+    if num_dims == 0:
+        return tensor
+    if axis == 0:
+        # Prepending length-one axes is a plain indexing operation and
+        # needs no shape-list construction
+        return tensor[(None,) * num_dims]
+    return insert_dims(tensor, num_dims, axis)
 
 
-def fft(tensor, axis=-1):
+def fft(tensor, axis=-1, normalize=True):
     r"""Computes the normalized DFT along a specified axis.
 
     This operation computes the normalized one-dimensional discrete Fourier
@@ -87,23 +88,17 @@ def fft(tensor, axis=-1):
         Tensor of arbitrary shape.
     axis : int
         Indicates the dimension along which the DFT is taken.
+    normalize : bool
+        If `False`, the :math:`1/\sqrt{N}` scaling is skipped, so that the
+        caller can fold it into a subsequent element-wise operation.
+        Defaults to `True`.
 
     Output
     ------
     : torch.complex
         Tensor of the same dtype and shape as ``tensor``.
     """
-    fft_size = tensor.shape[axis]
-    scale = 1 / torch.sqrt(torch.tensor(fft_size, dtype=tensor.dtype, device=tensor.device))
-
-    if axis not in [-1, tensor.ndim]:
-        tensor = tensor.transpose(axis, -1)
-        output = torch.fft.fft(tensor)
-        output = output.transpose(axis, -1)
-    else:
-        output = torch.fft.fft(tensor)
-
-    return scale * output
+    return torch.fft.fft(tensor, dim=axis, norm="ortho" if normalize else "backward")
 
 
 
@@ -161,6 +156,12 @@ class OFDMDemodulator(nn.Module):
         Integer indicating the length of the cyclic prefix that
         is prepended to each OFDM symbol.
 
+    output_dtype : torch.dtype
+        Complex dtype of the output resource grid. Setting this to
+        `torch.complex32` halves the memory traffic of the post-FFT
+        phase compensation; the FFT itself stays in `torch.complex64`.
+        Defaults to `torch.complex64`.
+
     Input
     -----
     :[...,num_ofdm_symbols*(fft_size+cyclic_prefix_length)+n], torch.complex64
@@ -174,11 +175,19 @@ class OFDMDemodulator(nn.Module):
         two dimension.
     """
 
-    def __init__(self, fft_size, l_min, cyclic_prefix_length=0):
+    def __init__(self, fft_size, l_min, cyclic_prefix_length=0,
+                 output_dtype=torch.complex64):
         super(OFDMDemodulator, self).__init__()
+        assert output_dtype in (torch.complex32, torch.complex64), \
+            "`output_dtype` must be a complex dtype."
+        self._output_dtype = output_dtype
         self.fft_size = fft_size
         self.l_min = l_min
         self.cyclic_prefix_length = cyclic_prefix_length
+        self._build_phase_compensation()
+        self._out_cache = {}
+        self._shape_cache = {}
+        self._compiled_forward = None
 
     @property
     def fft_size(self):
@@ -188,6 +197,12 @@ class OFDMDemodulator(nn.Module):
     def fft_size(self, value):
         assert value > 0, "`fft_size` must be positive."
         self._fft_size = int(value)
+        if hasattr(self, "_cyclic_prefix_length"):
+            self._period = self._fft_size + self._cyclic_prefix_length
+        if hasattr(self, "_shape_cache"):
+            self._shape_cache.clear()
+        if hasattr(self, "_l_min"):
+            self._build_phase_compensation()
 
     @property
     def l_min(self):
@@ -197,6 +212,12 @@ class OFDMDemodulator(nn.Module):
     def l_min(self, value):
         assert value <= 0, "l_min must be nonpositive."
         self._l_min = int(value)
+        if hasattr(self, "_fft_size"):
+            self._build_phase_compensation()
+
+    @property
+    def output_dtype(self):
+        return self._output_dtype
 
     @property
     def cyclic_prefix_length(self):
@@ -206,7 +227,33 @@ class OFDMDemodulator(nn.Module):
     def cyclic_prefix_length(self, value):
         assert value >= 0, "`cyclic_prefix_length` must be nonnegative."
         self._cyclic_prefix_length = int(value)
-
+        # Length of one OFDM symbol in the time domain
+        self._period = self._fft_size + self._cyclic_prefix_length
+        if hasattr(self, "_shape_cache"):
+            self._shape_cache.clear()
+
+    def _build_phase_compensation(self):
+        """Precomputes the subcarrier-dependent phase compensation
+        :math:`e^{\\frac{-j2\\pi k L_\\text{min}}{N}}` as a buffer, as it only
+        depends on ``fft_size`` and ``l_min``.
+
+        The :math:`1/\\sqrt{N}` normalization of the DFT is folded into the
+        buffer, so that the FFT output needs a single element-wise multiply
+        instead of two. The buffer is additionally stored in `fftshift`
+        order, which lets `forward` write each half of the spectrum directly
+        into its shifted position while multiplying, instead of running a
+        separate `fftshift` pass over the grid."""
+        tmp = -2 * PI * self._l_min \
+            / self._fft_size \
+            * torch.arange(self._fft_size, dtype=torch.float32)
+        rot = torch.polar(torch.ones_like(tmp), tmp)
+        rot = rot / np.sqrt(self._fft_size)
+        rot = torch.fft.fftshift(rot, dim=0)
+        self.register_buffer("_phase_compensation",
+                             rot.to(self._output_dtype))
+        # Real and imaginary planes of the buffer for the CPU SoA path
+        self.register_buffer("_phase_re", rot.real.clone())
+        self.register_buffer("_phase_im", rot.imag.clone())
 
     def forward(self, inputs):
         """Demodulate OFDM waveform onto a resource grid.
@@ -219,41 +266,129 @@ class OFDMDemodulator(nn.Module):
             `torch.complex64` : The demodulated inputs of shape
             `[...,num_ofdm_symbols, fft_size]`.
         """
-        tmp = -2 * PI * self.l_min \
-            / self.fft_size \
-            * torch.arange(self.fft_size, dtype=torch.float32)
-        self._phase_compensation = torch.exp(torch.complex(torch.tensor(0.0), tmp))
-
-        # Compute number of elements that will be truncated
-        self._rest = np.mod(inputs.shape[-1],
-                                self.fft_size + self.cyclic_prefix_length)
-
-        # Compute number of full OFDM symbols to be demodulated
-        self._num_ofdm_symbols = np.floor_divide(
-                                    inputs.shape[-1]-self._rest,
-                                    self.fft_size + self.cyclic_prefix_length)
-        # Cut last samples that do not fit into an OFDM symbol
-        inputs = inputs if self._rest==0 else inputs[...,:-self._rest]
-        # print("demod:inputs:",inputs)
-        # Reshape input to separate OFDM symbols
-        new_shape = list(inputs.shape[:-1]) + [self._num_ofdm_symbols, self.fft_size + self.cyclic_prefix_length]
-        
-        x = inputs.view(new_shape)
-
-        # Remove cyclic prefix
-        x = x[..., self.cyclic_prefix_length:]
+        if inputs.is_cuda:
+            # On GPU, the body is a clean op sequence that Inductor can
+            # fuse; reduce-overhead additionally removes per-kernel
+            # launch latency via CUDA graphs. Compiled lazily so that
+            # CPU-only use never pays for it.
+            if self._compiled_forward is None:
+                self._compiled_forward = torch.compile(
+                    self._forward_impl, mode="reduce-overhead")
+            return self._compiled_forward(inputs)
+        return self._forward_impl(inputs)
+
+    def _forward_impl(self, inputs):
+        # The symbol count and truncation only depend on the trailing
+        # length, which rarely changes in a steady stream; look them up
+        # instead of recomputing per call
+        length = inputs.shape[-1]
+        cached = self._shape_cache.get(length)
+        if cached is None:
+            # Compute number of elements that will be truncated
+            rest = length % self._period
+
+            # Compute number of full OFDM symbols to be demodulated
+            num_ofdm_symbols = (length - rest) // self._period
+
+            if len(self._shape_cache) >= 8:
+                self._shape_cache.pop(next(iter(self._shape_cache)))
+            self._shape_cache[length] = (num_ofdm_symbols, rest)
+        else:
+            num_ofdm_symbols, rest = cached
+
+        if inputs.stride(-1) == 1:
+            # Address the fft_size post-CP samples of each symbol directly
+            # in the input storage. Cyclic prefixes and trailing samples
+            # are simply never addressed, so neither the truncation nor
+            # the CP removal moves any data, and the FFT axis stays
+            # unit-stride.
+            x = inputs.as_strided(
+                size=inputs.shape[:-1] + (num_ofdm_symbols, self.fft_size),
+                stride=inputs.stride()[:-1] + (self._period, 1),
+                storage_offset=inputs.storage_offset()
+                               + self.cyclic_prefix_length)
+        else:
+            # Cut last samples that do not fit into an OFDM symbol
+            inputs = inputs if rest==0 else inputs[...,:-rest]
+
+            # Reshape input to separate OFDM symbols
+            new_shape = list(inputs.shape[:-1]) + [num_ofdm_symbols, self._period]
+            x = inputs.reshape(*new_shape)
+
+            # Remove cyclic prefix
+            x = x[..., self.cyclic_prefix_length:]
         # print("demod:x:",x)
 
-        # Compute FFT
-        x = fft(x)
-        # print("demod:x after fft:",x)
+        # Collapse all leading dimensions into a single FFT batch
+        # dimension, so that one large FFT launch covers all symbols
+        output_shape = x.shape
+        x = x.reshape(-1, self.fft_size)
 
-        # Apply phase shift compensation to all subcarriers
-        rot = self._phase_compensation.to(x.dtype)
-        rot = expand_to_rank(rot, x.dim(), 0)
-        x = x * rot
+        # Compute FFT (unnormalized, the 1/sqrt(N) scaling is part of
+        # the phase compensation)
+        x = fft(x, normalize=False)
+
+        # Cast down before the bandwidth-bound post-FFT pass
+        if x.dtype != self._output_dtype:
+            x = x.to(self._output_dtype)
 
-        # Shift DC subcarrier to the middle
-        x = fftshift(x, axes=-1)
+        # Apply phase shift compensation to all subcarriers and shift the
+        # DC subcarrier to the middle
+        out = self._apply_phase_compensation(x)
 
-        return torch.tensor(x)
+        # Restore the [...,num_ofdm_symbols,fft_size] shape
+        return out.reshape(output_shape)
+
+    def _apply_phase_compensation(self, x):
+        """Multiplies the raw FFT output by the cached phase-compensation
+        buffer and shifts the DC subcarrier to the middle.
+
+        This is the single post-FFT pass over the resource grid: the
+        buffer is stored in `fftshift` order, so each half of the spectrum
+        is multiplied straight into its shifted position in the output
+        (one read and one write per element). A device-specific kernel
+        for small ``fft_size`` can be plugged in here without touching
+        the shape logic in `forward`."""
+        rot = self._phase_compensation.to(x.dtype)
+        if x.requires_grad:
+            # out= writes into a reused buffer are not differentiable,
+            # so keep an allocating two-pass path under autograd
+            return torch.fft.fftshift(x, dim=-1) * rot
+        out = self._get_output_buffer(x)
+        shift = self.fft_size // 2
+        split = self.fft_size - shift
+        if x.device.type == "cpu" and x.dtype == torch.complex64:
+            # Interleaved complex multiplies vectorize poorly on CPU.
+            # Rotating the real and imaginary planes separately turns
+            # the multiply into plain FP32 multiply/add chains that the
+            # vectorized FP32 kernels handle.
+            re, im = torch.view_as_real(x).unbind(-1)
+            o_re, o_im = torch.view_as_real(out).unbind(-1)
+            c, s = self._phase_re, self._phase_im
+            torch.sub(re[..., split:] * c[:shift],
+                      im[..., split:] * s[:shift], out=o_re[..., :shift])
+            torch.add(re[..., split:] * s[:shift],
+                      im[..., split:] * c[:shift], out=o_im[..., :shift])
+            torch.sub(re[..., :split] * c[shift:],
+                      im[..., :split] * s[shift:], out=o_re[..., shift:])
+            torch.add(re[..., :split] * s[shift:],
+                      im[..., :split] * c[shift:], out=o_im[..., shift:])
+        else:
+            torch.mul(x[..., split:], rot[:shift], out=out[..., :shift])
+            torch.mul(x[..., :split], rot[shift:], out=out[..., shift:])
+        return out
+
+    def _get_output_buffer(self, x):
+        """Returns a preallocated output buffer matching ``x`` in shape,
+        dtype and device, caching the last two shapes seen to avoid
+        re-allocating the resource grid on every call in tight inference
+        loops. A later call with the same shape overwrites the grid
+        returned earlier."""
+        key = (x.shape, x.dtype, x.device)
+        out = self._out_cache.get(key)
+        if out is None:
+            if len(self._out_cache) >= 2:
+                self._out_cache.pop(next(iter(self._out_cache)))
+            out = torch.empty_like(x)
+            self._out_cache[key] = out
+        return out
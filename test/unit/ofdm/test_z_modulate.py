@@ -7,13 +7,11 @@ import unittest
 import numpy as np
 from torch import nn
 import torch.nn.functional as F
+import os
 import sys
-sys.path.insert(0, 'D:\sionna-main')
-try:
-    import comcloak
-except ImportError as e:
-    import sys
-    sys.path.append("../")
+if 'comcloak' not in sys.modules:
+    sys.path.insert(0,
+        os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 # from sionna.mimo import StreamManagement
 # from .ofdm_test_module import *
 
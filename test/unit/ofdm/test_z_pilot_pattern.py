@@ -2,13 +2,11 @@ import unittest
 import pytest
 import numpy as np
 import torch
+import os
 import sys
-sys.path.insert(0, 'D:\sionna-main')
-try:
-    import sionna
-except ImportError as e:
-    import sys
-    sys.path.append("../")
+if 'comcloak' not in sys.modules:
+    sys.path.insert(0,
+        os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 
 # GPU configuration
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -20,6 +18,17 @@ if torch.cuda.is_available():
 from comcloak.ofdm import PilotPattern, EmptyPilotPattern
 
 
+def _build_mask_and_pilots(shape, true_slices, pilot_value=0):
+    """Builds a boolean pilot mask with the given slices set to True,
+    together with a matching constant pilot tensor."""
+    mask = np.zeros(shape, bool)
+    for s in true_slices:
+        mask[s] = True
+    num_pilots = int(mask.reshape(*shape[:2], -1).sum(-1).max())
+    pilots = np.full([*shape[:2], num_pilots], pilot_value, np.complex64)
+    return mask, pilots
+
+
 class TestPilotPattern(unittest.TestCase):
     """Unittest for the PilotPattern Class"""
     def test_check_settings(self):
@@ -35,63 +44,44 @@ class TestPilotPattern(unittest.TestCase):
             PilotPattern(mask, pilots)
         with self.assertRaises(AssertionError):
             # pilots and mask haves different first two dimensions
-            mask = np.zeros([1,2,14,64], bool)
-            mask[0,0,0,:] = True
-            mask[0,1,1,:] = True
-            num_pilots = np.max(np.sum(mask, (-2,-1)))
-            pilots = np.zeros([1,3,num_pilots], np.complex64)
+            mask, pilots = _build_mask_and_pilots(
+                [1,2,14,64], [np.s_[0,0,0], np.s_[0,1,1]])
+            pilots = np.zeros([1,3,pilots.shape[-1]], np.complex64)
             PilotPattern(mask, pilots)
         with self.assertRaises(AssertionError):
             # mask has a different number of Trues
-            mask = np.zeros([1,2,14,64], bool)
-            mask[0,0,0,:] = True
-            mask[0,1,1:3,:] = True
-            num_pilots = np.max(np.sum(mask, (-2,-1)))
-            pilots = np.zeros([1,2,num_pilots], np.complex64)
+            mask, pilots = _build_mask_and_pilots(
+                [1,2,14,64], [np.s_[0,0,0], np.s_[0,1,1:3]])
             PilotPattern(mask, pilots)
         with self.assertRaises(AssertionError):
             # pilots has a the wrong last dimension
-            mask = np.zeros([1,2,14,64], bool)
-            mask[0,0,0,:] = True
-            mask[0,1,1,:] = True
-            num_pilots = np.max(np.sum(mask, (-2,-1)))
-            pilots = np.zeros([1,2,num_pilots+1], np.complex64)
+            mask, pilots = _build_mask_and_pilots(
+                [1,2,14,64], [np.s_[0,0,0], np.s_[0,1,1]])
+            pilots = np.zeros([1,2,pilots.shape[-1]+1], np.complex64)
             PilotPattern(mask, pilots)
 
     def test_properties(self):
-        mask = np.zeros([1,2,14,64], bool)
-        mask[0,0,0,:] = True
-        mask[0,1,1,:] = True
-        num_pilots = np.max(np.sum(mask, (-2,-1)))
-        pilots = np.zeros([1,2,num_pilots], np.complex64)
+        mask, pilots = _build_mask_and_pilots(
+            [1,2,14,64], [np.s_[0,0,0], np.s_[0,1,1]])
         pp = PilotPattern(mask, pilots)
         self.assertEqual(pp.num_pilot_symbols, 64)
         self.assertEqual(pp.num_data_symbols, 13*64)
 
-        mask = np.zeros([1,2,14,64], bool)
-        mask[0,0,:2,:] = True
-        mask[0,1,1:3,:] = True
-        num_pilots = np.max(np.sum(mask, (-2,-1)))
-        pilots = np.zeros([1,2,num_pilots], np.complex64)
+        mask, pilots = _build_mask_and_pilots(
+            [1,2,14,64], [np.s_[0,0,:2], np.s_[0,1,1:3]])
         pp = PilotPattern(mask, pilots)
         self.assertEqual(pp.num_pilot_symbols, 128)
         self.assertEqual(pp.num_data_symbols, 12*64)
 
     def test_trainable_pilots(self):
-        mask = np.zeros([1,2,14,64], bool)
-        mask[0,0,0,:] = True
-        mask[0,1,1,:] = True
-        num_pilots = np.max(np.sum(mask, (-2,-1)))
-        pilots = np.zeros([1,2,num_pilots], np.complex64)
+        mask, pilots = _build_mask_and_pilots(
+            [1,2,14,64], [np.s_[0,0,0], np.s_[0,1,1]])
         pp = PilotPattern(mask, pilots, trainable=True)
         self.assertTrue(pp.pilots.requires_grad)
 
     def test_normalized_pilots(self):
-        mask = np.zeros([1,2,14,64], bool)
-        mask[0,0,0,:] = True
-        mask[0,1,1,:] = True
-        num_pilots = np.max(np.sum(mask, (-2,-1)))
-        pilots = 3*np.ones([1,2,num_pilots], np.complex64)
+        mask, pilots = _build_mask_and_pilots(
+            [1,2,14,64], [np.s_[0,0,0], np.s_[0,1,1]], pilot_value=3)
         pp = PilotPattern(mask, pilots, normalize=True)
         self.assertTrue(np.allclose(torch.mean(np.abs(pp.pilots)**2, -1), 1.0))
 